@@ -1,12 +1,13 @@
 import asyncio
+import hashlib
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.responses import PlainTextResponse
 
-from mixitup_translator import pronouns
-from mixitup_translator.utils import JSONResponse, NoRefreshException
+from mixitup_translator import pronouns, utils
+from mixitup_translator.utils import JSONResponse, render_json
 
 log = logging.getLogger("mixitup-translator")
 
@@ -15,6 +16,7 @@ logging.basicConfig(level=logging.DEBUG, format="%(asctime)s\t%(levelname)s\t%(n
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await utils.open_session()
     tasks = []
     tasks.extend(await pronouns.startup())
 
@@ -23,6 +25,7 @@ async def lifespan(app: FastAPI):
     for task in tasks:
         task.cancel()
     await asyncio.gather(*tasks)
+    await utils.close_session()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -41,28 +44,39 @@ async def get_pronouns_about():
 
 
 @app.get("/pronouns/v1/user/{user}", response_class=JSONResponse)
-async def get_pronouns_user(user: str):
+async def get_pronouns_user(user: str, request: Request):
     async with asyncio.TaskGroup() as tg:
         p_task = tg.create_task(pronouns.PRONOUNS.get())
-        u_task = tg.create_task(pronouns.USERS.get_user(user))
-    return pronouns.Users.convert_json(p_task.result(), u_task.result())
+        u_task = tg.create_task(pronouns.USERS.get_user_resource(user))
+    user_resource = u_task.result()
+    cached = user_resource.render_cache
+    if cached is not None and cached[0] == pronouns.PRONOUNS.version:
+        body, etag = cached[1], cached[2]
+    else:
+        body = render_json(pronouns.Users.convert_json(p_task.result(), user_resource.data))
+        etag = f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+        user_resource.render_cache = (pronouns.PRONOUNS.version, body, etag)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "max-age=60"},
+    )
 
 
 @app.post("/pronouns/v1/refresh/pronouns", response_class=PlainTextResponse)
 async def post_pronouns_refresh_pronouns():
-    try:
-        await pronouns.PRONOUNS.fetch(force=True)
-    except NoRefreshException as e:
-        raise HTTPException(status_code=425, detail=str(e))
+    if not await pronouns.PRONOUNS.fetch(force=True):
+        raise HTTPException(status_code=425, detail="Not refreshed, data is too fresh or upstream is unavailable")
     return "Successfully refreshed pronouns list"
 
 
 @app.post("/pronouns/v1/refresh/user/{user}", response_class=PlainTextResponse)
 async def post_pronouns_refresh_user(user: str):
-    try:
-        await pronouns.USERS.fetch_user(user, force=True)
-    except NoRefreshException as e:
-        raise HTTPException(status_code=425, detail=str(e))
+    _, refreshed = await pronouns.USERS.fetch_user(user, force=True)
+    if not refreshed:
+        raise HTTPException(status_code=425, detail="Not refreshed, data is too fresh or upstream is unavailable")
     return f"Successfully refreshed user {user.lower()}"
 
 
@@ -70,6 +84,8 @@ if __name__ == "__main__":
     import uvicorn
 
     try:
-        uvicorn.run(app, host="0.0.0.0", port=55555)
+        # "auto" picks uvloop where it is installed (non-Windows) and falls back gracefully elsewhere;
+        # httptools replaces the pure-Python h11 parser
+        uvicorn.run(app, host="0.0.0.0", port=55555, loop="auto", http="httptools")
     except KeyboardInterrupt:
         pass
@@ -1,10 +1,13 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta, timezone
+import sys
+from collections import OrderedDict
+from datetime import timedelta
 
 from fastapi import HTTPException
+from yarl import URL
 
-from mixitup_translator.utils import NoRefreshException, RemoteResource
+from mixitup_translator.utils import RemoteResource
 
 log = logging.getLogger(__name__)
 
@@ -29,91 +32,224 @@ _example_user_2 = {
     "alt_pronoun_id": None,
 }
 
+# Response dict keys, interned once so hot-path dict inserts reuse the same key objects
+K_ERROR = sys.intern("error")
+K_SINGULAR = sys.intern("singular")
+K_PRONOUN_ID = sys.intern("pronoun_id")
+K_ALT_PRONOUN_ID = sys.intern("alt_pronoun_id")
+K_PRONOUN = sys.intern("pronoun")
+K_ALT_PRONOUN = sys.intern("alt_pronoun")
+K_DISPLAY = sys.intern("display")
+K_DISPLAY_LOWER = sys.intern("display_lower")
+K_DISPLAY_UPPER = sys.intern("display_upper")
+K_SUBJECT = sys.intern("subject")
+K_SUBJECT_POSSESSIVE = sys.intern("subject_possessive")
+K_OBJECT = sys.intern("object")
+K_SUBJECT_LOWER = sys.intern("subject_lower")
+K_SUBJECT_POSSESSIVE_LOWER = sys.intern("subject_possessive_lower")
+K_OBJECT_LOWER = sys.intern("object_lower")
+
+# Derived pronoun fields keyed by (pronoun_id, alt_pronoun_id), cleared when the pronouns table changes
+_CONVERT_CACHE: dict[tuple[str, str | None], dict] = {}
+_CONVERT_CACHE_VERSION = -1
+
+
+def _build_case_variants(pronouns: dict) -> dict[str, tuple[str, str, str, str]]:
+    """Precompute (subject_lower, subject_upper, object_lower, object_upper) per pronoun_id.
+
+    Kept in a side table rather than on the pronoun dicts themselves, which are embedded
+    verbatim in user responses.
+    """
+    return {
+        pronoun_id: (
+            pronoun[K_SUBJECT].lower(),
+            pronoun[K_SUBJECT].upper(),
+            pronoun[K_OBJECT].lower(),
+            pronoun[K_OBJECT].upper(),
+        )
+        for pronoun_id, pronoun in pronouns.items()
+    }
+
 
 class Pronouns(RemoteResource):
     url = "https://api.pronouns.alejo.io/v1/pronouns"
     refresh_max = timedelta(hours=6)
 
+    def __init__(self):
+        super().__init__()
+        self.case_variants: dict[str, tuple[str, str, str, str]] = {}
+
+    async def _fetch_http(self) -> bool:
+        old_version = self.version
+        refreshed = await super()._fetch_http()
+        if self.version != old_version:
+            # An error payload ({"error": 404}) has no pronoun entries to precompute
+            self.case_variants = _build_case_variants(self.data) if K_ERROR not in self.data else {}
+        return refreshed
+
     async def get(self):
-        try:
-            await self.fetch()
-        except NoRefreshException:
-            pass
+        data = self.peek()
+        if data is not None:
+            return data
+        await self.fetch()
         return self.data
 
 
+class UserBatcher:
+    """Funnel user fetches through one queue so arrivals in the same tick go upstream as one batch.
+
+    The upstream API has no multi-user endpoint yet, so a batch is an asyncio.gather of single
+    GETs capped by a semaphore; if a bulk endpoint appears, only _run_batch needs to change.
+    """
+
+    max_batch = 32
+    max_concurrent = 32
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.semaphore = asyncio.Semaphore(self.max_concurrent)
+        # Strong references so in-flight batch tasks can't be garbage collected mid-run
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    async def fetch(self, resource: RemoteResource, force: bool = False) -> bool:
+        fut = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((resource, force, fut))
+        return await fut
+
+    async def worker(self):
+        log.info("Starting user fetch batcher task")
+        while True:
+            try:
+                batch = [await self.queue.get()]
+            except asyncio.CancelledError:
+                break
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+        while not self.queue.empty():
+            # Entries enqueued after the last drain would otherwise hang their callers forever
+            _, _, fut = self.queue.get_nowait()
+            fut.set_exception(asyncio.CancelledError("User fetch batcher shut down"))
+            fut.exception()  # Mark retrieved in case the caller was cancelled too
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        log.info("Shutting down user fetch batcher task")
+
+    async def _run_batch(self, batch: list):
+        if len(batch) > 1:
+            log.debug(f"Batching {len(batch)} user fetches")
+        results = await asyncio.gather(
+            *(self._fetch_one(resource, force) for resource, force, _ in batch), return_exceptions=True
+        )
+        for (_, _, fut), result in zip(batch, results):
+            if isinstance(result, BaseException):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    async def _fetch_one(self, resource: RemoteResource, force: bool) -> bool:
+        async with self.semaphore:
+            return await resource.fetch(force=force)
+
+
 class Users:
-    url = "https://api.pronouns.alejo.io/v1/users/{user}"
-    users: dict[str, RemoteResource]
+    url_prefix = "https://api.pronouns.alejo.io/v1/users/"
+    url = url_prefix + "{user}"  # Template form, shown in ABOUT
+    max_users = 10_000
+    dead_age_s = RemoteResource.refresh_max.total_seconds() * 10
+    users: OrderedDict[str, RemoteResource]
 
     def __init__(self):
-        self.users = {}
+        self.users = OrderedDict()
+        self.batcher = UserBatcher()
 
-    async def fetch_user(self, user: str, force: bool = False):
+    async def fetch_user(self, user: str, force: bool = False) -> tuple[RemoteResource, bool]:
         user = user.lower()
         user_resource = self.users.get(user)
+        now = asyncio.get_running_loop().time()
+        if (
+            user_resource is not None
+            and user_resource.last_refreshed_mono != float("-inf")  # Never-fetched entries aren't dead, just new
+            and now - user_resource.last_refreshed_mono > self.dead_age_s
+        ):
+            # Entry sat unused long past expiry, start fresh instead of revalidating ancient state
+            del self.users[user]
+            user_resource = None
         if user_resource is None:
             user_resource = RemoteResource()
-            user_resource.url = self.url.format(user=user)
+            # Prebuilt yarl.URL so aiohttp doesn't re-parse the string on every request
+            user_resource.url = URL(self.url_prefix + user)
             self.users[user] = user_resource
-        await user_resource.fetch(force=force)
+            if len(self.users) > self.max_users:
+                evicted, _ = self.users.popitem(last=False)
+                log.debug(f"Evicted {evicted} to keep under {self.max_users} cached users")
+        else:
+            self.users.move_to_end(user)
+        refreshed = await self.batcher.fetch(user_resource, force=force)
+        return user_resource, refreshed
+
+    async def get_user_resource(self, user: str) -> RemoteResource:
+        user = user.lower()
+        user_resource = self.users.get(user)
+        if user_resource is not None and user_resource.peek() is not None:
+            self.users.move_to_end(user)  # Keep the LRU order honest on the fast path
+            return user_resource
+        user_resource, _ = await self.fetch_user(user)
         return user_resource
 
     async def get_user(self, user: str):
-        try:
-            user_resource = await self.fetch_user(user)
-        except NoRefreshException:
-            user_resource = self.users[user.lower()]
-        return user_resource.data
-
-    async def flush_users(self):
-        log.info("Starting flush_users task")
-        while True:
-            try:
-                await asyncio.sleep(600)
-            except asyncio.CancelledError:
-                break
-            clear_time = datetime.now(tz=timezone.utc) - RemoteResource.refresh_max
-            to_clear = [k for k, v in self.users.items() if v.last_refreshed < clear_time]
-            for key in to_clear:
-                del self.users[key]
-            if to_clear:
-                log.debug(f"Cleared out {to_clear}")
-        log.info("Shutting down flush_users task")
+        return (await self.get_user_resource(user)).data
 
     @staticmethod
     def convert_json(pronouns: dict, user: dict) -> dict:
-        if "error" in user:
+        global _CONVERT_CACHE_VERSION
+        if K_ERROR in user:
             raise HTTPException(status_code=404, detail="not_found")
-        response = dict(user)
-        response["pronoun"] = pronouns[user["pronoun_id"]]
-        if user["alt_pronoun_id"]:
-            response["alt_pronoun"] = pronouns[user["alt_pronoun_id"]]
-        else:
-            response["alt_pronoun"] = None
+        if _CONVERT_CACHE_VERSION != PRONOUNS.version:
+            _CONVERT_CACHE.clear()
+            _CONVERT_CACHE_VERSION = PRONOUNS.version
+        key = (user[K_PRONOUN_ID], user[K_ALT_PRONOUN_ID])
+        derived = _CONVERT_CACHE.get(key)
+        if derived is None:
+            pronoun = pronouns[key[0]]
+            alt_pronoun = pronouns[key[1]] if key[1] else None
+            # (subject_lower, subject_upper, object_lower, object_upper) from the side table
+            p_var = PRONOUNS.case_variants[key[0]]
+            alt_var = PRONOUNS.case_variants[key[1]] if key[1] else None
+            derived = {K_PRONOUN: pronoun, K_ALT_PRONOUN: alt_pronoun}
 
-        if response["pronoun"]["singular"]:
-            response["display"] = response["pronoun"]["subject"]
-        elif response["alt_pronoun"]:
-            response["display"] = f'{response["pronoun"]["subject"]}/{response["alt_pronoun"]["subject"]}'
-        else:
-            response["display"] = f'{response["pronoun"]["subject"]}/{response["pronoun"]["object"]}'
-        response["display_lower"] = response["display"].lower()
-        response["display_upper"] = response["display"].upper()
-
-        if response["pronoun"]["singular"] or response["pronoun_id"] == "theythem":
-            response["subject"] = "They"
-            response["subject_possessive"] = "They're"
-            response["object"] = "Them"
-        else:
-            response["subject"] = response["pronoun"]["subject"]
-            response["subject_possessive"] = f"{response['subject']}'s"
-            response["object"] = response["pronoun"]["object"]
-        response["subject_lower"] = response["subject"].lower()
-        response["subject_possessive_lower"] = response["subject_possessive"].lower()
-        response["object_lower"] = response["object"].lower()
+            if pronoun[K_SINGULAR]:
+                derived[K_DISPLAY] = pronoun[K_SUBJECT]
+                derived[K_DISPLAY_LOWER] = p_var[0]
+                derived[K_DISPLAY_UPPER] = p_var[1]
+            elif alt_pronoun:
+                derived[K_DISPLAY] = f"{pronoun[K_SUBJECT]}/{alt_pronoun[K_SUBJECT]}"
+                derived[K_DISPLAY_LOWER] = f"{p_var[0]}/{alt_var[0]}"
+                derived[K_DISPLAY_UPPER] = f"{p_var[1]}/{alt_var[1]}"
+            else:
+                derived[K_DISPLAY] = f"{pronoun[K_SUBJECT]}/{pronoun[K_OBJECT]}"
+                derived[K_DISPLAY_LOWER] = f"{p_var[0]}/{p_var[2]}"
+                derived[K_DISPLAY_UPPER] = f"{p_var[1]}/{p_var[3]}"
+
+            if pronoun[K_SINGULAR] or key[0] == "theythem":
+                derived[K_SUBJECT] = "They"
+                derived[K_SUBJECT_POSSESSIVE] = "They're"
+                derived[K_OBJECT] = "Them"
+                derived[K_SUBJECT_LOWER] = "they"
+                derived[K_SUBJECT_POSSESSIVE_LOWER] = "they're"
+                derived[K_OBJECT_LOWER] = "them"
+            else:
+                derived[K_SUBJECT] = pronoun[K_SUBJECT]
+                derived[K_SUBJECT_POSSESSIVE] = f"{pronoun[K_SUBJECT]}'s"
+                derived[K_OBJECT] = pronoun[K_OBJECT]
+                derived[K_SUBJECT_LOWER] = p_var[0]
+                derived[K_SUBJECT_POSSESSIVE_LOWER] = f"{p_var[0]}'s"
+                derived[K_OBJECT_LOWER] = p_var[2]
+            _CONVERT_CACHE[key] = derived
 
-        return response
+        return {**user, **derived}
 
 
 PRONOUNS = Pronouns()
@@ -128,5 +264,5 @@ ABOUT = {
 
 async def startup() -> list:
     await PRONOUNS.fetch()  # Grab the pronouns db to start with
-    task = asyncio.create_task(USERS.flush_users())
+    task = asyncio.create_task(USERS.batcher.worker())
     return [task]
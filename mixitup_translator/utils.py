@@ -1,50 +1,152 @@
-import json
+import asyncio
 import logging
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 
 import aiohttp
+import orjson
 from fastapi.responses import JSONResponse as FlatJSONResponse
+from yarl import URL
 
 log = logging.getLogger(__name__)
 
+USER_AGENT = f"{aiohttp.http.SERVER_SOFTWARE} github.com/Latent-Logic/mixitup-translator"
 
-class NoRefreshException(Exception):
-    pass
+SESSION: aiohttp.ClientSession | None = None
+
+
+async def open_session():
+    global SESSION
+    SESSION = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, limit_per_host=32, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=10),
+        headers={aiohttp.hdrs.USER_AGENT: USER_AGENT},
+    )
+
+
+async def close_session():
+    global SESSION
+    if SESSION is not None:
+        await SESSION.close()
+        SESSION = None
 
 
 class RemoteResource:
-    user_agent = f"{aiohttp.http.SERVER_SOFTWARE} github.com/Latent-Logic/mixitup-translator"
     refresh_min: timedelta = timedelta(minutes=1)
     refresh_max: timedelta = timedelta(hours=1)
-    last_refreshed: datetime = datetime.fromisoformat("2020-01-01T01:01:01-00:00")
+    retry_backoff_s: float = 5.0  # How long to serve stale data before retrying a failed refresh
+    not_found_ttl_s: float = 60.0  # Shorter TTL for cached 404s so unknown users aren't refetched at full rate
+    last_refreshed_mono: float = float("-inf")  # loop.time() of the last refresh, -inf means never
+    last_attempt_mono: float = float("-inf")  # loop.time() of the last refresh attempt
     data: dict
-    url: str
+    url: str | URL
+    etag: str | None
+    last_modified: str | None
+    version: int
+    render_cache: tuple[int, bytes, str] | None  # (pronouns version, body bytes, ETag)
+    _inflight: asyncio.Future | None
 
     def __init__(self):
+        self._refresh_min_s = self.refresh_min.total_seconds()
+        self._refresh_max_s = self.refresh_max.total_seconds()
         self.data = {}
+        self.etag = None
+        self.last_modified = None
+        self.version = 0
+        self.render_cache = None
+        self._inflight = None
+
+    def peek(self) -> dict | None:
+        """Return the cached data if it is still fresh, else None"""
+        if asyncio.get_running_loop().time() - self.last_refreshed_mono < self._refresh_max_s:
+            return self.data
+        return None
 
-    def _should_refresh(self, force: bool = False):
-        age = datetime.now(tz=timezone.utc) - self.last_refreshed
-        if age > self.refresh_max:
+    def _should_refresh(self, force: bool = False) -> bool:
+        age = asyncio.get_running_loop().time() - self.last_refreshed_mono
+        if age > self._refresh_max_s:
             return True
-        if force and age > self.refresh_min:
+        if force and age > self._refresh_min_s:
             log.info(f"Force refreshing {self.url}")
             return True
-        raise NoRefreshException(f"Not refreshing, data is {age} old")
+        return False
+
+    async def fetch(self, force: bool = False) -> bool:
+        """Refresh data if it is due, returning whether a refresh happened"""
+        if self._inflight is not None:
+            return await self._inflight  # Someone else is already fetching, share their result
+        if not self._should_refresh(force):
+            return False
+        now = asyncio.get_running_loop().time()
+        if (
+            self.last_attempt_mono > self.last_refreshed_mono  # The last attempt failed
+            and now - self.last_attempt_mono < self.retry_backoff_s
+            and self.data
+            and "error" not in self.data
+        ):
+            return False  # Keep serving stale data until the backoff expires
+        self.last_attempt_mono = now
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight = fut
+        try:
+            refreshed = await self._fetch_http()
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # Mark retrieved in case no other caller is waiting
+            raise
+        else:
+            fut.set_result(refreshed)
+        finally:
+            self._inflight = None
+        return refreshed
+
+    async def _fetch_http(self) -> bool:
+        """Run the HTTP refresh, returning False when stale data was kept after an upstream failure"""
+        headers = {}
+        if self.etag:
+            headers[aiohttp.hdrs.IF_NONE_MATCH] = self.etag
+        if self.last_modified:
+            headers[aiohttp.hdrs.IF_MODIFIED_SINCE] = self.last_modified
+        try:
+            await self._fetch_http_inner(headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if self.data and "error" not in self.data:
+                # Stale-while-revalidate: upstream blip, keep the old data; last_refreshed_mono
+                # stays put so the next request past retry_backoff_s tries again
+                log.warning(f"Refresh of {self.url} failed ({e!r}), serving stale data")
+                return False
+            raise
+        return True
+
+    async def _fetch_http_inner(self, headers: dict):
+        async with SESSION.get(self.url, headers=headers) as resp:
+            if resp.status == 304:
+                log.debug(f"{self.url} unchanged (304), keeping cached data")
+                self.last_refreshed_mono = asyncio.get_running_loop().time()
+                return
+            if resp.status == 404:
+                self.data = {"error": 404}
+                # Drop the validators from the old 200, or a later 304 would "revalidate" this error
+                self.etag = None
+                self.last_modified = None
+                self._refresh_max_s = self.not_found_ttl_s
+                self.version += 1
+                self.render_cache = None
+                self.last_refreshed_mono = asyncio.get_running_loop().time()
+                return
+            resp.raise_for_status()
+            self.data = orjson.loads(await resp.read())
+            self._refresh_max_s = self.refresh_max.total_seconds()
+            self.etag = resp.headers.get(aiohttp.hdrs.ETAG)
+            self.last_modified = resp.headers.get(aiohttp.hdrs.LAST_MODIFIED)
+            self.version += 1
+            self.render_cache = None
+            self.last_refreshed_mono = asyncio.get_running_loop().time()
+
 
-    async def fetch(self, force: bool = False):
-        self._should_refresh(force)
-        async with aiohttp.ClientSession(headers={aiohttp.hdrs.USER_AGENT: self.user_agent}) as session:
-            async with session.get(self.url) as resp:
-                if resp.status == 404:
-                    self.data = {"error": 404}
-                    self.last_refreshed = datetime.now(tz=timezone.utc)
-                    return
-                resp.raise_for_status()
-                self.data = await resp.json()
-                self.last_refreshed = datetime.now(tz=timezone.utc)
+def render_json(content) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
 
 
 class JSONResponse(FlatJSONResponse):
     def render(self, content) -> bytes:
-        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=4, separators=(",", ":")).encode("utf-8")
+        return render_json(content)